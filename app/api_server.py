@@ -0,0 +1,30 @@
+# app/api_server.py
+"""
+Headless HTTP QA service (no UI).
+
+Run ONE async worker per model copy:
+    python app/api_server.py
+That process holds one SentenceTransformer and one cross-encoder; concurrent
+requests are served by the event loop, with their query embeddings
+micro-batched into single embed calls. Do not start several workers per
+process group (e.g. `--workers 4`): each would load its own copy of the
+models. To scale out, run more single-worker instances (containers/hosts)
+on the same RAG_STORE_DIR; they share ingest state and the memory-mapped
+document indexes through it.
+"""
+import sys
+import os
+
+# Ensure project root is on sys.path so "multi_modal_rag.*" imports resolve
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from multi_modal_rag.serving.api import create_app
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8000")))
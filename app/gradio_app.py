@@ -8,89 +8,105 @@ if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
 import gradio as gr
-from multi_modal_rag.ingestion.pdf_ingest import extract_pdf
-# use the safe high-level OCR function (see step 2)
-from multi_modal_rag.ingestion.ocr import ocr_try_best, ocr_tesseract
-from multi_modal_rag.chunking.chunker import chunk_item
+import time
+from multi_modal_rag.ingestion.jobs import IngestJobManager
 from multi_modal_rag.embeddings.embedder import embed_texts
-from multi_modal_rag.index.indexer import FaissIndexer
 from multi_modal_rag.llm.generator import generate_answer
+from multi_modal_rag.retrieval.reranker import CrossEncoderReranker, RERANK_CANDIDATES
 
+TOP_K = 5  # chunks passed to the LLM
+# Set USE_RERANKER=0 to send FAISS top-k straight to the LLM
+USE_RERANKER = os.getenv("USE_RERANKER", "1") != "0"
 
-# ----------- MAIN PIPELINE FUNCTION -------------- #
 
-def process_pdf(file):
-    """Ingest PDF → OCR → Chunk → Embed → Build FAISS index."""
+# ----------- BACKGROUND INGESTION -------------- #
 
-    items = extract_pdf(file.name)
-    
-    # OCR for images
-    for it in items:
-        if it["type"] == "image":
-            try:
-                text = ocr_try_best(it["content"])
-            except Exception:
-                text = ocr_tesseract(it["content"])
-            it["metadata"]["ocr_text"] = text
-
-    # Chunking
-    chunks = []
-    metas = []
-    for it in items:
-        cs = chunk_item(it)
-        for c in cs:
-            chunks.append(c["text"])
-            metas.append({
-                "id": c["id"],
-                "page": c["page"],
-                "type": c["type"]
-            })
-
-    # Embeddings
-    embeddings = embed_texts(chunks)
-    index = FaissIndexer(dim=embeddings.shape[1])
-    index.add(embeddings, metas)
-
-    return chunks, metas, index
+# Ingests (PDF → OCR → Chunk → Embed → FAISS) run in a bounded worker pool,
+# one job per document. Each session keeps the job id to poll progress and,
+# once ready, its own reference to the (chunks, metas, index) result in
+# gr.State, so the document lives as long as the session even after the
+# shared job registry evicts the job.
+jobs = IngestJobManager()
+reranker = CrossEncoderReranker() if USE_RERANKER else None
+if reranker:
+    # Load at startup: no concurrent first-query loads, no load time in rerank_ms
+    reranker.load()
 
 
 # ----------- QA FUNCTION AFTER PDF IS LOADED -------------- #
 
-def answer_question(question, state):
+def answer_question(question, job_id, doc):
     """Retrieve → Build context → Generate answer."""
-    
-    chunks, metas, index = state
+
+    if doc is None:
+        job = jobs.get(job_id) if job_id else None
+        if job is None:
+            return "Please upload and process a PDF first.", ""
+        if not job.ready:
+            return f"The document is not ready yet. {job.status_line()}", ""
+        doc = job.result
+
+    chunks, metas, index = doc
 
     # Embed query
+    t0 = time.perf_counter()
     q_emb = embed_texts([question])[0]
 
-    # Retrieve top 5 chunks
-    results = index.search(q_emb, top_k=5)
-
-    context_items = []
-    for meta, _ in results:
-        idx = metas.index(meta)
-        context_items.append({
-            "page": meta["page"],
-            "text": chunks[idx]
+    # Retrieve top-N candidates (top-k when reranking is off)
+    results = index.search_ids([q_emb], top_k=RERANK_CANDIDATES if reranker else TOP_K)[0]
+    retrieve_ms = (time.perf_counter() - t0) * 1000
+
+    # FAISS row ids are positions in chunks/metas (same insertion order)
+    candidates = []
+    for idx, score in results:
+        candidates.append({
+            "page": metas[idx]["page"],
+            "text": chunks[idx],
+            "score": score
         })
 
+    # Rerank and keep only the best k for the LLM prompt
+    if reranker:
+        context_items, rerank_stats = reranker.rerank(question, candidates, top_k=TOP_K)
+    else:
+        context_items, rerank_stats = candidates, None
+
     # Generate answer using LLM
+    t1 = time.perf_counter()
     answer = generate_answer(context_items, question)
+    llm_ms = (time.perf_counter() - t1) * 1000
 
     # Build formatted retrieved snippets (for display)
     retrieved_text = ""
     for c in context_items:
         retrieved_text += f"(Page {c['page']}) {c['text'][:400]}...\n\n"
 
+    timing = f"retrieve {retrieve_ms:.0f} ms"
+    if rerank_stats:
+        timing += (f" | rerank {rerank_stats['rerank_ms']:.0f} ms ({rerank_stats['reason']}, "
+                   f"{rerank_stats['pairs_scored']} scored, {rerank_stats['cache_hits']} cached)")
+    timing += f" | llm {llm_ms:.0f} ms"
+    retrieved_text += f"[{timing}]"
+
     return answer, retrieved_text
 
 
 # ----------- GRADIO UI -------------- #
 
 def load_pdf_ui(pdf_file):
-    chunks, metas, index = process_pdf(pdf_file)
-    return (chunks, metas, index), "PDF processed successfully! Ask questions now."
+    if pdf_file is None:
+        return None, None, "Please upload a PDF first.", gr.Timer(active=False)
+    job = jobs.submit(getattr(pdf_file, "name", pdf_file))
+    # Start polling only while there is a job in flight
+    return job.id, job.result, job.status_line(), gr.Timer(active=not job.done)
+
+
+def poll_status(job_id):
+    job = jobs.get(job_id) if job_id else None
+    if job is None:
+        return gr.update(), gr.update(), gr.Timer(active=False)
+    # Hand the session its own reference to the result; stop polling once done
+    return job.status_line(), job.result, gr.Timer(active=not job.done)
 
 
 with gr.Blocks(title="Multi-Modal RAG QA System") as demo:
@@ -103,12 +119,22 @@ with gr.Blocks(title="Multi-Modal RAG QA System") as demo:
 
     status = gr.Textbox(label="Status")
 
-    state = gr.State()
+    state = gr.State()      # job id
+    doc_state = gr.State()  # (chunks, metas, index) once the job is ready
+
+    # Polls the background job so progress shows without blocking a worker;
+    # activated by load_pdf_ui and switched off once the job is done
+    timer = gr.Timer(1.0, active=False)
+    timer.tick(
+        fn=poll_status,
+        inputs=state,
+        outputs=[status, doc_state, timer]
+    )
 
     load_btn.click(
         fn=load_pdf_ui,
         inputs=pdf_input,
-        outputs=[state, status]
+        outputs=[state, doc_state, status, timer]
     )
 
     question = gr.Textbox(label="Ask a question")
@@ -119,7 +145,7 @@ with gr.Blocks(title="Multi-Modal RAG QA System") as demo:
 
     answer_btn.click(
         fn=answer_question,
-        inputs=[question, state],
+        inputs=[question, state, doc_state],
         outputs=[answer_box, retrieved_box]
     )
 
@@ -1,7 +1,10 @@
 # index/indexer.py
+import logging
 import faiss
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class FaissIndexer:
     def __init__(self, dim):
         self.index = faiss.IndexFlatIP(dim)
@@ -15,10 +18,49 @@ class FaissIndexer:
     def search(self, q_emb, top_k=5):
         if q_emb.ndim == 1:
             q_emb = q_emb.reshape(1, -1)
-        faiss.normalize_L2(q_emb)
-        D, I = self.index.search(q_emb.astype('float32'), top_k)
-        results = []
-        for idx, score in zip(I[0], D[0]):
-            if idx < len(self.metadatas):
-                results.append((self.metadatas[idx], score))
-        return results
+        return self.search_batch(q_emb, top_k)[0]
+
+    def search_ids(self, q_embs, top_k=5):
+        """
+        Search several queries in one FAISS call. Returns, per query, a list
+        of (row_id, score); row ids are positions in the order chunks were
+        added, so callers can index their chunk/meta lists directly.
+        """
+        q_embs = np.ascontiguousarray(q_embs, dtype='float32')
+        faiss.normalize_L2(q_embs)
+        D, I = self.index.search(q_embs, top_k)
+        all_results = []
+        for ids, scores in zip(I, D):
+            # FAISS pads with -1 when top_k exceeds the index size
+            all_results.append([(int(idx), float(score)) for idx, score in zip(ids, scores)
+                                if 0 <= idx < len(self.metadatas)])
+        return all_results
+
+    def search_batch(self, q_embs, top_k=5):
+        """Search several queries in one FAISS call; one (meta, score) list per query."""
+        return [[(self.metadatas[idx], score) for idx, score in results]
+                for results in self.search_ids(q_embs, top_k)]
+
+    def save(self, path):
+        faiss.write_index(self.index, path)
+
+    @classmethod
+    def load(cls, path, metas, mmap=True):
+        """
+        Load an index written by `save`. With mmap=True the vectors are
+        memory-mapped read-only, so processes serving the same file share
+        one copy through the OS page cache.
+        """
+        flags = 0
+        if mmap:
+            # IO_FLAG_MMAP only covers IVF lists; flat-index codes need
+            # IO_FLAG_MMAP_IFC (faiss >= 1.11)
+            if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+                flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            else:
+                logger.warning("faiss %s cannot memory-map flat indexes; loading %s into memory "
+                               "(upgrade to faiss-cpu>=1.11).", faiss.__version__, path)
+        obj = cls.__new__(cls)
+        obj.index = faiss.read_index(path, flags)
+        obj.metadatas = list(metas)
+        return obj
@@ -0,0 +1,207 @@
+# index/store.py
+"""
+On-disk per-document index store.
+Each document lives in <root>/<doc_id>/ as a FAISS index file plus its chunks
+and metadata. Readers load the index memory-mapped and read-only, so every
+worker process serving a document shares one copy of the vectors.
+
+In-flight ingests are tracked next to it, so that all workers see them:
+<doc_id>.pending is an O_EXCL lock held by the worker running the ingest
+(it contains that worker's owner token), and <doc_id>.progress.json is its
+latest progress snapshot.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .indexer import FaissIndexer
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.json"
+PENDING_SUFFIX = ".pending"
+PROGRESS_SUFFIX = ".progress.json"
+STALE_AFTER_S = 600  # a pending lock with no progress for this long is taken over
+
+# Document ids are SHA-256 hex digests of the PDF (see ingestion.jobs.file_digest)
+_DOC_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_valid_doc_id(doc_id) -> bool:
+    return bool(doc_id) and bool(_DOC_ID_RE.match(doc_id))
+
+
+class DocumentStore:
+    def __init__(self, root, max_loaded=32):
+        self.root = root
+        self.max_loaded = max_loaded
+        os.makedirs(root, exist_ok=True)
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, doc_id):
+        if not is_valid_doc_id(doc_id):
+            raise ValueError(f"Invalid document id: {doc_id!r}")
+        return os.path.join(self.root, doc_id)
+
+    def exists(self, doc_id):
+        return is_valid_doc_id(doc_id) and os.path.exists(
+            os.path.join(self.root, doc_id, CHUNKS_FILE))
+
+    # ----------- INGEST STATE (shared across workers) -------------- #
+
+    def _pending_path(self, doc_id):
+        return self.path(doc_id) + PENDING_SUFFIX
+
+    def _progress_path(self, doc_id):
+        return self.path(doc_id) + PROGRESS_SUFFIX
+
+    def _last_activity(self, doc_id):
+        mtimes = [0.0]
+        for p in (self._pending_path(doc_id), self._progress_path(doc_id)):
+            try:
+                mtimes.append(os.path.getmtime(p))
+            except OSError:
+                pass
+        return max(mtimes)
+
+    def _create_lock(self, lock, token):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return True
+
+    def _lock_owner(self, doc_id):
+        try:
+            with open(self._pending_path(doc_id), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def claim(self, doc_id, stale_after=STALE_AFTER_S):
+        """
+        Try to become the one worker that ingests `doc_id`. Returns an owner
+        token (pass it to `release` / `owns`), or None if another worker
+        holds a live lock.
+
+        A lock whose ingest has shown no progress for `stale_after` seconds
+        (owner died) is taken over: it is atomically renamed aside, so of
+        several workers racing for it only one wins; the winner re-checks
+        what it moved and puts it back if it turned out to be a fresh lock.
+        """
+        lock = self._pending_path(doc_id)
+        token = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+        if not self._create_lock(lock, token):
+            if time.time() - self._last_activity(doc_id) < stale_after:
+                return None
+            aside = f"{lock}.stale-{uuid.uuid4().hex}"
+            try:
+                os.rename(lock, aside)
+            except FileNotFoundError:
+                pass  # someone else moved it; compete for the free slot below
+            else:
+                if time.time() - os.path.getmtime(aside) < stale_after:
+                    # Moved a lock another worker just created: restore it
+                    try:
+                        os.link(aside, lock)
+                    except FileExistsError:
+                        pass
+                    os.remove(aside)
+                    return None
+                os.remove(aside)
+            if not self._create_lock(lock, token):
+                return None
+
+        self.write_progress(doc_id, {"doc_id": doc_id, "stage": "queued"})
+        return token
+
+    def owns(self, doc_id, token):
+        return token is not None and self._lock_owner(doc_id) == token
+
+    def release(self, doc_id, token):
+        """Remove the lock only if it is still held by `token`."""
+        if self.owns(doc_id, token):
+            try:
+                os.remove(self._pending_path(doc_id))
+            except FileNotFoundError:
+                pass
+
+    def is_pending(self, doc_id):
+        return is_valid_doc_id(doc_id) and os.path.exists(self._pending_path(doc_id))
+
+    def write_progress(self, doc_id, progress):
+        """Atomically replace the progress snapshot of `doc_id`."""
+        fd, tmp = tempfile.mkstemp(prefix=f".{doc_id[:12]}-", suffix=".json", dir=self.root)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(progress, f)
+            os.replace(tmp, self._progress_path(doc_id))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def read_progress(self, doc_id):
+        if not is_valid_doc_id(doc_id):
+            return None
+        try:
+            with open(self._progress_path(doc_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ----------- DOCUMENTS -------------- #
+
+    def save(self, doc_id, chunks, metas, index):
+        """
+        Write the document atomically: build it in a temp dir, then rename.
+        If another worker already stored the same document, keep theirs.
+        """
+        final = self.path(doc_id)
+        if self.exists(doc_id):
+            return
+        tmp = tempfile.mkdtemp(prefix=f".{doc_id[:12]}-", dir=self.root)
+        try:
+            index.save(os.path.join(tmp, INDEX_FILE))
+            with open(os.path.join(tmp, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump({"chunks": chunks, "metas": metas}, f)
+            os.replace(tmp, final)
+        except OSError:
+            if not self.exists(doc_id):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def load(self, doc_id):
+        """
+        Return (chunks, metas, index) for a stored document. Loaded documents
+        are cached per process (LRU, `max_loaded` entries).
+        """
+        with self._lock:
+            doc = self._loaded.get(doc_id)
+            if doc is not None:
+                self._loaded.move_to_end(doc_id)
+                return doc
+
+        path = self.path(doc_id)
+        with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        index = FaissIndexer.load(os.path.join(path, INDEX_FILE), data["metas"], mmap=True)
+        doc = (data["chunks"], data["metas"], index)
+
+        with self._lock:
+            self._loaded[doc_id] = doc
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return doc
@@ -0,0 +1,274 @@
+"""
+Background ingestion jobs.
+Runs PDF → OCR → Chunk → Embed → FAISS in a bounded worker pool, one job
+per document, and exposes stage-level progress so the UI can poll it.
+"""
+import hashlib
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from multi_modal_rag.ingestion.pdf_ingest import extract_pdf
+from multi_modal_rag.ingestion.ocr import ocr_try_best
+from multi_modal_rag.chunking.chunker import chunk_item
+from multi_modal_rag.index.indexer import FaissIndexer
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 2          # concurrent ingests (each one is CPU/memory heavy)
+EMBED_BATCH_SIZE = 64    # chunks per embed_texts call (progress granularity)
+MAX_JOBS = 8             # finished jobs kept for dedup (callers hold their own results)
+
+# Job stages, in pipeline order
+STAGES = ("queued", "extracting", "ocr", "chunking", "embedding", "indexing", "ready")
+FAILED = "failed"
+
+
+def file_digest(filepath, block_size=1 << 20) -> str:
+    """
+    SHA-256 of the file contents. Used as the job id so that concurrent
+    uploads of the same PDF share one ingest.
+    """
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run_ingest(filepath, progress=None, embed_batch_size=EMBED_BATCH_SIZE, embed_fn=None):
+    """
+    Ingest PDF → OCR → Chunk → Embed → Build FAISS index.
+
+    `progress` is an optional callable taking keyword fields (stage, counters)
+    that is invoked as each stage advances. `embed_fn` defaults to
+    `embed_texts` (imported lazily so the model only loads when needed).
+    Returns (chunks, metas, index).
+    """
+    report = progress or (lambda **fields: None)
+    if embed_fn is None:
+        from multi_modal_rag.embeddings.embedder import embed_texts as embed_fn
+
+    # 1) Extraction
+    report(stage="extracting")
+    items = extract_pdf(filepath)
+    pages = {it["page"] for it in items}
+    report(pages_extracted=len(pages))
+
+    # 2) OCR for images (bytes → PIL)
+    images = [it for it in items if it["type"] == "image"]
+    report(stage="ocr", images_total=len(images))
+    for n, it in enumerate(images, start=1):
+        try:
+            pil_img = Image.open(io.BytesIO(it["content"]))
+            it["metadata"]["ocr_text"] = ocr_try_best(pil_img)
+        except Exception:
+            it["metadata"]["ocr_text"] = ""
+        report(images_ocrd=n)
+
+    # 3) Chunking
+    report(stage="chunking")
+    chunks = []
+    metas = []
+    for it in items:
+        for c in chunk_item(it):
+            chunks.append(c["text"])
+            metas.append({
+                "id": c["id"],
+                "page": c["page"],
+                "type": c["type"]
+            })
+    if not chunks:
+        raise ValueError("No content could be extracted from the PDF.")
+
+    # 4) Embeddings (batched so progress is visible on large documents)
+    report(stage="embedding", chunks_total=len(chunks))
+    batches = []
+    for start in range(0, len(chunks), embed_batch_size):
+        batches.append(embed_fn(chunks[start:start + embed_batch_size]))
+        report(chunks_embedded=min(start + embed_batch_size, len(chunks)))
+    embeddings = np.vstack(batches)
+
+    # 5) Index
+    report(stage="indexing")
+    index = FaissIndexer(dim=embeddings.shape[1])
+    index.add(embeddings, metas)
+
+    return chunks, metas, index
+
+
+class IngestJob:
+    """
+    State of a single document ingest. Counters are updated from the worker
+    thread; read them through `progress()` / `status_line()`.
+    """
+
+    def __init__(self, job_id, filepath):
+        self.id = job_id
+        self.filepath = filepath
+        self.stage = "queued"
+        self.pages_extracted = 0
+        self.images_total = 0
+        self.images_ocrd = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.error = None
+        self.result = None  # (chunks, metas, index) once ready
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _update(self, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    @property
+    def ready(self):
+        return self.stage == "ready"
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes (or timeout). Returns the result or None."""
+        self._done.wait(timeout)
+        return self.result
+
+    def progress(self):
+        """Snapshot of the job state as a plain dict."""
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "stage": self.stage,
+                "pages_extracted": self.pages_extracted,
+                "images_total": self.images_total,
+                "images_ocrd": self.images_ocrd,
+                "chunks_total": self.chunks_total,
+                "chunks_embedded": self.chunks_embedded,
+                "error": self.error,
+                "elapsed_s": round(end - self.submitted_at, 1),
+            }
+
+    def status_line(self):
+        """Human-readable one-line status for the UI."""
+        p = self.progress()
+        if p["stage"] == "ready":
+            return (f"PDF processed successfully! Ask questions now. "
+                    f"({p['pages_extracted']} pages, {p['chunks_total']} chunks, {p['elapsed_s']}s)")
+        if p["stage"] == FAILED:
+            return f"Processing failed: {p['error']}"
+        return (f"[{p['stage']}] pages extracted: {p['pages_extracted']} | "
+                f"images OCR'd: {p['images_ocrd']}/{p['images_total']} | "
+                f"chunks embedded: {p['chunks_embedded']}/{p['chunks_total']} | "
+                f"{p['elapsed_s']}s")
+
+
+class IngestJobManager:
+    """
+    Runs ingests in a bounded background thread pool.
+    Jobs are keyed by file content, so re-submitting a PDF that is already
+    queued, running or ready returns the existing job instead of a new one.
+    Failed jobs are retried on re-submit. At most `max_jobs` jobs are kept;
+    beyond that the least recently used finished jobs are dropped from the
+    registry. Jobs still queued or running are never evicted. Eviction only
+    ends dedup for that document: callers that need a result for longer
+    (e.g. a UI session) keep their own reference to `job.result`, which
+    stays alive for as long as they hold it.
+
+    Hooks, all called from the worker thread:
+      - `on_ready(job, result)` runs before the job is marked ready (e.g. to
+        persist the index); if it raises, the job fails.
+      - `on_progress(job)` runs after every progress update.
+      - `on_done(job)` runs once the job is ready or failed (cleanup).
+    With keep_results=False the in-memory result is dropped after on_ready,
+    for callers that serve the persisted copy instead.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, embed_batch_size=EMBED_BATCH_SIZE,
+                 embed_fn=None, on_ready=None, on_progress=None, on_done=None,
+                 keep_results=True, max_jobs=MAX_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._embed_batch_size = embed_batch_size
+        self._embed_fn = embed_fn
+        self._on_ready = on_ready
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._keep_results = keep_results
+        self._max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, filepath, job_id=None):
+        """
+        Queue an ingest of `filepath`. `job_id` is the file's content digest;
+        pass it when already known to skip re-reading the file.
+        """
+        if job_id is None:
+            job_id = file_digest(filepath)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.stage != FAILED:
+                self._jobs.move_to_end(job_id)
+                return job
+            job = IngestJob(job_id, filepath)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._evict()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _evict(self):
+        """Drop least recently used finished jobs beyond max_jobs (lock held)."""
+        excess = len(self._jobs) - self._max_jobs
+        for job_id in [jid for jid, job in self._jobs.items() if job.done][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        def progress(**fields):
+            job._update(**fields)
+            if self._on_progress is not None:
+                self._on_progress(job)
+
+        try:
+            result = run_ingest(job.filepath, progress=progress,
+                                embed_batch_size=self._embed_batch_size,
+                                embed_fn=self._embed_fn)
+            if self._on_ready is not None:
+                self._on_ready(job, result)
+            if not self._keep_results:
+                result = None
+            job._update(result=result, stage="ready", finished_at=time.time())
+        except Exception as e:
+            logger.exception("Ingest job %s failed", job.id)
+            job._update(error=str(e), stage=FAILED, finished_at=time.time())
+        finally:
+            if self._on_done is not None:
+                try:
+                    self._on_done(job)
+                except Exception:
+                    logger.exception("on_done hook failed for ingest job %s", job.id)
+            job._done.set()
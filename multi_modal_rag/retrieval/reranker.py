@@ -0,0 +1,151 @@
+"""
+Optional cross-encoder reranking between FAISS retrieval and the LLM.
+Fetch top-N from the index, score (query, chunk) pairs in one batched call
+with a small local cross-encoder, and pass only the best k to the generator.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20   # top-N fetched from FAISS before reranking
+EARLY_EXIT_MARGIN = 0.15 # cosine gap between rank k and k+1 that skips reranking
+CACHE_SIZE = 4096        # (query, chunk) scores kept in memory
+
+
+class CrossEncoderReranker:
+    """
+    Batched cross-encoder reranker with a (query, chunk) score cache,
+    early exit on confident first-stage results and latency accounting.
+
+    The model is loaded by `load()` (call it at startup) or lazily on first
+    use; if sentence-transformers' CrossEncoder cannot be loaded, `rerank`
+    keeps the first-stage order.
+    """
+
+    def __init__(self, model_name=RERANK_MODEL, early_exit_margin=EARLY_EXIT_MARGIN,
+                 cache_size=CACHE_SIZE, batch_size=32):
+        self.model_name = model_name
+        self.early_exit_margin = early_exit_margin
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+
+        self._model = None
+        self._available = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+
+        self.last_stats = {}
+        self.totals = {"calls": 0, "early_exits": 0, "pairs_scored": 0,
+                       "cache_hits": 0, "rerank_ms": 0.0}
+
+    def load(self):
+        """Load the cross-encoder once (thread-safe). Returns whether it is available."""
+        if self._available is not None:
+            return self._available
+        with self._model_lock:
+            if self._available is not None:
+                return self._available
+            try:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name)
+                logger.info("Cross-encoder %s loaded.", self.model_name)
+                self._available = True
+            except Exception:
+                logger.exception("Cross-encoder %s unavailable; reranking disabled.", self.model_name)
+                self._model = None
+                self._available = False
+        return self._available
+
+    def _cache_get(self, key):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key, score):
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def score(self, query, texts):
+        """
+        Cross-encoder scores for (query, text) pairs. Cached pairs are reused;
+        the rest are scored in a single batched predict call.
+        Returns (scores, cache_hits).
+        """
+        scores = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self._cache_get((query, text))
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+
+        if missing:
+            preds = self._model.predict([(query, texts[i]) for i in missing],
+                                        batch_size=self.batch_size)
+            for i, s in zip(missing, preds):
+                scores[i] = float(s)
+                self._cache_put((query, texts[i]), scores[i])
+
+        return scores, len(texts) - len(missing)
+
+    def rerank(self, query, candidates, top_k=5):
+        """
+        Rerank first-stage candidates and keep the best `top_k`.
+
+        `candidates` are dicts with at least "text" and "score" (the FAISS
+        similarity), ordered by first-stage rank; they are not modified.
+        Returns (items, stats): items are copies with a "rerank_score" added
+        when the cross-encoder ran; stats hold the latency and cache accounting.
+        """
+        few = len(candidates) <= top_k
+        # First stage is already confident about the top-k cut
+        confident = not few and (
+            candidates[top_k - 1]["score"] - candidates[top_k]["score"] >= self.early_exit_margin)
+        # A lazy model load is not part of the reported rerank latency
+        available = few or confident or self.load()
+
+        start = time.perf_counter()
+        stats = {"candidates": len(candidates), "early_exit": False,
+                 "pairs_scored": 0, "cache_hits": 0}
+
+        if few:
+            reason = "few_candidates"
+            ranked = list(candidates)
+        elif confident:
+            reason = "margin"
+            stats["early_exit"] = True
+            ranked = list(candidates[:top_k])
+        elif not available:
+            reason = "model_unavailable"
+            ranked = list(candidates[:top_k])
+        else:
+            reason = "reranked"
+            scores, hits = self.score(query, [c["text"] for c in candidates])
+            stats["pairs_scored"] = len(candidates) - hits
+            stats["cache_hits"] = hits
+            scored = [dict(c, rerank_score=s) for c, s in zip(candidates, scores)]
+            ranked = sorted(scored, key=lambda c: c["rerank_score"], reverse=True)[:top_k]
+
+        stats["reason"] = reason
+        stats["rerank_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        with self._lock:
+            self.last_stats = stats
+            self.totals["calls"] += 1
+            self.totals["early_exits"] += int(stats["early_exit"])
+            self.totals["pairs_scored"] += stats["pairs_scored"]
+            self.totals["cache_hits"] += stats["cache_hits"]
+            self.totals["rerank_ms"] += stats["rerank_ms"]
+
+        return ranked[:top_k], stats
@@ -0,0 +1,285 @@
+"""
+Headless HTTP QA service over the RAG pipeline.
+
+Endpoints:
+    POST /ingest            upload a PDF; returns its doc_id and ingest progress
+    GET  /ingest/{doc_id}   ingest progress
+    POST /query             answer one question about a document
+    POST /query/batch       answer several questions about a document
+    GET  /health            service stats
+
+Query embeddings from concurrent requests are micro-batched into single
+`embed_texts` calls on a dedicated thread, so they never queue behind LLM
+calls, which run in their own pool; FAISS search runs in a third pool so
+the event loop (and the batcher's flush timer) is never blocked.
+
+One app instance is the scaling unit: it holds one copy of each model and
+carries concurrency on its event loop. Instances pointed at the same
+store_dir share ingest state and finished indexes through it (see
+index/store.py): one instance runs each ingest, every instance reports its
+progress, and every instance memory-maps the same read-only index.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from pydantic import BaseModel, Field
+
+from multi_modal_rag.index.store import DocumentStore, is_valid_doc_id
+from multi_modal_rag.ingestion.jobs import IngestJobManager, FAILED
+from multi_modal_rag.retrieval.reranker import CrossEncoderReranker, RERANK_CANDIDATES
+from multi_modal_rag.serving.batcher import EmbeddingBatcher
+
+TOP_K = 5
+STORE_DIR = os.getenv("RAG_STORE_DIR", "rag_store")
+
+
+class QueryRequest(BaseModel):
+    doc_id: str
+    question: str
+    top_k: int = Field(TOP_K, ge=1, le=50)
+
+
+class BatchQueryRequest(BaseModel):
+    doc_id: str
+    questions: List[str]
+    top_k: int = Field(TOP_K, ge=1, le=50)
+
+
+def create_app(embed_fn=None, generate_fn=None, store_dir=STORE_DIR, use_reranker=None,
+               max_ingest_workers=2, max_batch_size=32, max_wait_ms=5, llm_workers=8,
+               search_workers=4):
+    """
+    Build the FastAPI app.
+
+    `embed_fn` / `generate_fn` default to the SentenceTransformer `embed_texts`
+    and the Groq `generate_answer`; pass stubs to run the service locally
+    without a model download or API key. `llm_workers` bounds concurrent
+    rerank + LLM calls, `search_workers` concurrent FAISS searches.
+    """
+    if embed_fn is None:
+        from multi_modal_rag.embeddings.embedder import embed_texts as embed_fn
+    if generate_fn is None:
+        from multi_modal_rag.llm.generator import generate_answer as generate_fn
+    if use_reranker is None:
+        use_reranker = os.getenv("USE_RERANKER", "1") != "0"
+
+    reranker = None
+    if use_reranker:
+        reranker = CrossEncoderReranker()
+        reranker.load()
+
+    store = DocumentStore(store_dir)
+    upload_dir = os.path.join(store_dir, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+
+    # ----------- INGEST HOOKS (worker thread) -------------- #
+
+    def _progress(job):
+        progress = job.progress()
+        progress["doc_id"] = progress.pop("id")
+        return progress
+
+    def persist(job, result):
+        chunks, metas, index = result
+        store.save(job.id, chunks, metas, index)
+
+    # doc_id -> owner token of the store lock this worker holds for it
+    lock_tokens = {}
+
+    def publish_progress(job):
+        # A worker whose lock was taken over must not overwrite the new owner's progress
+        if store.owns(job.id, lock_tokens.get(job.id)):
+            store.write_progress(job.id, _progress(job))
+
+    def finish(job):
+        # Runs on success and failure: final state, unlock, drop the upload
+        token = lock_tokens.pop(job.id, None)
+        try:
+            if store.owns(job.id, token):
+                store.write_progress(job.id, _progress(job))
+        finally:
+            store.release(job.id, token)
+            try:
+                os.remove(job.filepath)
+            except OSError:
+                pass
+
+    jobs = IngestJobManager(max_workers=max_ingest_workers, embed_fn=embed_fn,
+                            on_ready=persist, on_progress=publish_progress, on_done=finish,
+                            keep_results=False)
+    batcher = EmbeddingBatcher(embed_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    llm_pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="llm")
+    search_pool = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="search")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        batcher.shutdown()
+        llm_pool.shutdown(wait=False)
+        search_pool.shutdown(wait=False)
+        jobs.shutdown(wait=False)
+
+    app = FastAPI(title="Multi-Modal RAG QA Service", lifespan=lifespan)
+    app.state.jobs = jobs
+    app.state.store = store
+    app.state.batcher = batcher
+    app.state.reranker = reranker
+
+    # ----------- HELPERS -------------- #
+
+    def _status(doc_id):
+        if store.exists(doc_id):
+            return {"doc_id": doc_id, "stage": "ready"}
+        progress = store.read_progress(doc_id)
+        if progress is not None:
+            return progress
+        if store.is_pending(doc_id):
+            # Lock taken, first snapshot not written yet
+            return {"doc_id": doc_id, "stage": "queued"}
+        return None
+
+    def _load(doc_id):
+        if not is_valid_doc_id(doc_id):
+            raise HTTPException(status_code=400, detail="Invalid doc_id.")
+        if store.exists(doc_id):
+            return store.load(doc_id)
+        status = _status(doc_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Unknown document; POST it to /ingest first.")
+        if status["stage"] == FAILED:
+            raise HTTPException(status_code=422, detail=f"Ingest failed: {status['error']}")
+        raise HTTPException(status_code=409, detail=status)
+
+    def _save_and_submit(data):
+        doc_id = hashlib.sha256(data).hexdigest()
+        if store.exists(doc_id):
+            return doc_id
+        token = store.claim(doc_id)
+        if token is None:
+            # Another worker is ingesting it
+            return doc_id
+        lock_tokens[doc_id] = token
+        try:
+            fd, path = tempfile.mkstemp(suffix=".pdf", dir=upload_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            jobs.submit(path, job_id=doc_id)
+        except BaseException:
+            lock_tokens.pop(doc_id, None)
+            store.release(doc_id, token)
+            raise
+        return doc_id
+
+    def _retrieve(doc, q_embs, fetch_k):
+        """FAISS search + candidate building (blocking; runs in search_pool)."""
+        chunks, metas, index = doc
+        all_candidates = []
+        # FAISS row ids are positions in chunks/metas (same insertion order)
+        for results in index.search_ids(q_embs, fetch_k):
+            all_candidates.append([{
+                "page": metas[idx]["page"],
+                "text": chunks[idx],
+                "score": score
+            } for idx, score in results])
+        return all_candidates
+
+    async def _answer(question, candidates, top_k, timings):
+        loop = asyncio.get_running_loop()
+        timings = dict(timings)
+
+        rerank_stats = None
+        if reranker:
+            context_items, rerank_stats = await loop.run_in_executor(
+                llm_pool, reranker.rerank, question, candidates, top_k)
+            timings["rerank"] = rerank_stats["rerank_ms"]
+        else:
+            context_items = candidates[:top_k]
+
+        t0 = time.perf_counter()
+        answer = await loop.run_in_executor(llm_pool, generate_fn, context_items, question)
+        timings["llm"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        return {
+            "question": question,
+            "answer": answer,
+            "sources": context_items,
+            "rerank": rerank_stats,
+            "timings_ms": timings,
+        }
+
+    def _fetch_k(top_k):
+        return max(RERANK_CANDIDATES, top_k) if reranker else top_k
+
+    # ----------- ENDPOINTS -------------- #
+
+    @app.post("/ingest", status_code=202)
+    async def ingest(file: UploadFile = File(...)):
+        data = await file.read()
+        if not data:
+            raise HTTPException(status_code=400, detail="Empty upload.")
+        loop = asyncio.get_running_loop()
+        doc_id = await loop.run_in_executor(None, _save_and_submit, data)
+        return _status(doc_id)
+
+    @app.get("/ingest/{doc_id}")
+    async def ingest_status(doc_id: str):
+        status = _status(doc_id) if is_valid_doc_id(doc_id) else None
+        if status is None:
+            raise HTTPException(status_code=404, detail="Unknown document.")
+        return status
+
+    @app.post("/query")
+    async def query(req: QueryRequest):
+        loop = asyncio.get_running_loop()
+        doc = await loop.run_in_executor(None, _load, req.doc_id)
+
+        t0 = time.perf_counter()
+        q_emb = await batcher.embed(req.question)
+        t1 = time.perf_counter()
+        candidates = (await loop.run_in_executor(
+            search_pool, _retrieve, doc, [q_emb], _fetch_k(req.top_k)))[0]
+        t2 = time.perf_counter()
+
+        timings = {"embed": round((t1 - t0) * 1000, 2), "search": round((t2 - t1) * 1000, 2)}
+        answer = await _answer(req.question, candidates, req.top_k, timings)
+        answer["doc_id"] = req.doc_id
+        return answer
+
+    @app.post("/query/batch")
+    async def query_batch(req: BatchQueryRequest):
+        loop = asyncio.get_running_loop()
+        doc = await loop.run_in_executor(None, _load, req.doc_id)
+        if not req.questions:
+            return {"doc_id": req.doc_id, "results": []}
+
+        t0 = time.perf_counter()
+        q_embs = await batcher.embed_many(req.questions)
+        t1 = time.perf_counter()
+        all_candidates = await loop.run_in_executor(
+            search_pool, _retrieve, doc, q_embs, _fetch_k(req.top_k))
+        t2 = time.perf_counter()
+
+        timings = {"embed": round((t1 - t0) * 1000, 2), "search": round((t2 - t1) * 1000, 2)}
+        answers = await asyncio.gather(*(
+            _answer(q, candidates, req.top_k, timings)
+            for q, candidates in zip(req.questions, all_candidates)
+        ))
+        return {"doc_id": req.doc_id, "results": answers}
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "embedding_batches": dict(batcher.stats),
+            "reranker": dict(reranker.totals) if reranker else None,
+        }
+
+    return app
@@ -0,0 +1,77 @@
+"""
+Micro-batching of query embeddings.
+Concurrent requests each ask for one embedding; the batcher collects them for
+a few milliseconds and issues a single `embed_texts` call for the whole batch.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent `embed` calls into batched calls of `embed_fn`.
+    A batch is flushed when it reaches `max_batch_size` or `max_wait_ms`
+    after its first request, whichever comes first. `embed_fn` is blocking
+    and runs on the batcher's own single thread, so embedding latency does
+    not depend on whatever else is using the loop's default executor.
+    """
+
+    def __init__(self, embed_fn, max_batch_size=32, max_wait_ms=5):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+        self.stats = {"batches": 0, "texts": 0}
+
+    async def embed(self, text):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((text, fut))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await fut
+
+    async def embed_many(self, texts):
+        """Embed several texts; they share batches with other in-flight requests."""
+        return await asyncio.gather(*(self.embed(t) for t in texts))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        texts = [text for text, _ in batch]
+        self.stats["batches"] += 1
+        self.stats["texts"] += len(texts)
+
+        loop = asyncio.get_running_loop()
+        try:
+            embs = await loop.run_in_executor(self._executor, self.embed_fn, texts)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), emb in zip(batch, embs):
+            if not fut.done():
+                fut.set_result(emb)
@@ -0,0 +1,58 @@
+import importlib.util
+import zlib
+
+import pytest
+
+# Test modules that import the PDF → FAISS pipeline, and what they need.
+# They are not collected when a dependency is missing (see the report header).
+PIPELINE_DEPS = ("numpy", "fitz", "faiss", "pdfplumber", "pytesseract")
+REQUIRES = {
+    "test_jobs.py": PIPELINE_DEPS,
+    "test_service.py": PIPELINE_DEPS + ("fastapi", "multipart", "httpx"),
+    "test_store.py": ("faiss",),
+}
+
+
+def _missing(modules):
+    return [m for m in modules if importlib.util.find_spec(m) is None]
+
+
+collect_ignore = [name for name, deps in REQUIRES.items() if _missing(deps)]
+
+
+def pytest_report_header(config):
+    return [f"skipping {name}: missing {', '.join(_missing(deps))}"
+            for name, deps in REQUIRES.items() if _missing(deps)]
+
+
+def _stub_embed(texts):
+    """Bag-of-words embedding with a stable word hash (crc32); model-free."""
+    import numpy as np
+
+    out = np.zeros((len(texts), 64), dtype="float32")
+    for i, t in enumerate(texts):
+        for w in t.lower().split():
+            out[i, zlib.crc32(w.strip(".?,").encode()) % 64] += 1.0
+    return out + 1e-3
+
+
+def _make_pdf(path, *pages):
+    """Write a PDF with one line of text per page; returns its path as str."""
+    import fitz
+
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def stub_embed():
+    return _stub_embed
+
+
+@pytest.fixture
+def make_pdf():
+    return _make_pdf
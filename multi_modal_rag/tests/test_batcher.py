@@ -0,0 +1,38 @@
+import asyncio
+
+from multi_modal_rag.serving.batcher import EmbeddingBatcher
+
+
+def test_concurrent_embeds_share_one_call():
+    calls = []
+
+    def embed_fn(texts):
+        calls.append(list(texts))
+        return [len(t) for t in texts]
+
+    async def run():
+        batcher = EmbeddingBatcher(embed_fn, max_batch_size=32, max_wait_ms=20)
+        single = batcher.embed("a")
+        many = batcher.embed_many(["bb", "ccc"])
+        return await asyncio.gather(single, many)
+
+    single, many = asyncio.run(run())
+
+    assert single == 1
+    assert many == [2, 3]
+    assert calls == [["a", "bb", "ccc"]]
+
+
+def test_full_batch_flushes_immediately():
+    calls = []
+
+    def embed_fn(texts):
+        calls.append(len(texts))
+        return list(texts)
+
+    async def run():
+        batcher = EmbeddingBatcher(embed_fn, max_batch_size=2, max_wait_ms=10000)
+        return await batcher.embed_many(["x", "y", "z", "w"])
+
+    assert asyncio.run(run()) == ["x", "y", "z", "w"]
+    assert calls == [2, 2]
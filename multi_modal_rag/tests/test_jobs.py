@@ -0,0 +1,76 @@
+import shutil
+import threading
+
+from multi_modal_rag.ingestion.jobs import IngestJobManager, run_ingest, file_digest, FAILED
+
+
+def test_run_ingest_reports_stage_counters(tmp_path, make_pdf, stub_embed):
+    pdf = make_pdf(tmp_path / "a.pdf", "first page", "second page")
+    updates = {}
+
+    chunks, metas, index = run_ingest(pdf, progress=updates.update, embed_fn=stub_embed)
+
+    assert len(chunks) == len(metas) == index.index.ntotal == 2
+    assert updates["stage"] == "indexing"
+    assert updates["pages_extracted"] == 2
+    assert updates["images_total"] == 0
+    assert updates["chunks_total"] == updates["chunks_embedded"] == 2
+
+
+def test_concurrent_submits_of_same_content_share_a_job(tmp_path, make_pdf, stub_embed):
+    release = threading.Event()
+
+    def slow_embed(texts):
+        release.wait(5)
+        return stub_embed(texts)
+
+    pdf = make_pdf(tmp_path / "a.pdf", "some text")
+    copy = str(tmp_path / "copy.pdf")
+    shutil.copy(pdf, copy)
+
+    manager = IngestJobManager(embed_fn=slow_embed)
+    job = manager.submit(pdf)
+    assert manager.submit(copy) is job
+    assert job.id == file_digest(pdf)
+
+    release.set()
+    chunks, metas, index = job.wait(5)
+    assert job.ready and chunks == ["some text"]
+    manager.shutdown()
+
+
+def test_failed_job_is_retried_on_resubmit(tmp_path, make_pdf, stub_embed):
+    calls = []
+
+    def flaky_embed(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("embedding backend down")
+        return stub_embed(texts)
+
+    pdf = make_pdf(tmp_path / "a.pdf", "some text")
+    manager = IngestJobManager(embed_fn=flaky_embed)
+
+    job = manager.submit(pdf)
+    assert job.wait(5) is None
+    assert job.stage == FAILED and "backend down" in job.error
+
+    retry = manager.submit(pdf)
+    assert retry is not job
+    assert retry.wait(5) is not None and retry.ready
+    manager.shutdown()
+
+
+def test_finished_jobs_are_evicted_beyond_max_jobs(tmp_path, make_pdf, stub_embed):
+    manager = IngestJobManager(embed_fn=stub_embed, max_jobs=1)
+    first = manager.submit(make_pdf(tmp_path / "a.pdf", "first document"))
+    session_doc = first.wait(5)  # what a UI session keeps in its own state
+    second = manager.submit(make_pdf(tmp_path / "b.pdf", "second document"))
+    second.wait(5)
+
+    assert manager.get(first.id) is None
+    assert manager.get(second.id) is second
+    # Eviction only ends dedup; a held result stays usable
+    chunks, metas, index = session_doc
+    assert chunks == ["first document"] and index.index.ntotal == 1
+    manager.shutdown()
@@ -0,0 +1,76 @@
+from multi_modal_rag.retrieval.reranker import CrossEncoderReranker
+
+
+class StubCrossEncoder:
+    """Scores a pair by how often the query word appears in the text."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32):
+        self.calls += 1
+        return [text.count(query) for query, text in pairs]
+
+
+def _reranker():
+    rr = CrossEncoderReranker()
+    rr._model = StubCrossEncoder()
+    rr._available = True
+    return rr
+
+
+def _candidates(texts, scores):
+    return [{"page": i + 1, "text": t, "score": s} for i, (t, s) in enumerate(zip(texts, scores))]
+
+
+def test_rerank_orders_by_cross_encoder_and_caches():
+    rr = _reranker()
+    texts = ["a", "cat", "cat cat cat", "dog", "cat cat"]
+    items, stats = rr.rerank("cat", _candidates(texts, [0.50, 0.49, 0.48, 0.47, 0.46]), top_k=2)
+
+    assert [c["text"] for c in items] == ["cat cat cat", "cat cat"]
+    assert stats["reason"] == "reranked"
+    assert stats["pairs_scored"] == 5
+
+    _, stats = rr.rerank("cat", _candidates(texts, [0.50, 0.49, 0.48, 0.47, 0.46]), top_k=2)
+    assert stats["cache_hits"] == 5
+    assert rr._model.calls == 1
+
+
+def test_rerank_early_exit_on_large_margin():
+    rr = _reranker()
+    texts = ["x", "y", "cat"]
+    items, stats = rr.rerank("cat", _candidates(texts, [0.9, 0.8, 0.2]), top_k=2)
+
+    assert [c["text"] for c in items] == ["x", "y"]
+    assert stats["early_exit"]
+    assert rr._model.calls == 0
+
+
+def test_rerank_does_not_modify_candidates():
+    rr = _reranker()
+    candidates = _candidates(["a", "cat", "dog"], [0.50, 0.49, 0.48])
+    items, _ = rr.rerank("cat", candidates, top_k=1)
+
+    assert items[0]["rerank_score"] == 1
+    assert all("rerank_score" not in c for c in candidates)
+
+
+def test_rerank_few_candidates_passes_through():
+    rr = _reranker()
+    candidates = _candidates(["a", "cat"], [0.50, 0.49])
+    items, stats = rr.rerank("cat", candidates, top_k=5)
+
+    assert items == candidates
+    assert stats["reason"] == "few_candidates"
+    assert rr._model.calls == 0
+
+
+def test_rerank_keeps_first_stage_order_when_model_unavailable():
+    rr = CrossEncoderReranker()
+    rr._available = False
+    items, stats = rr.rerank("cat", _candidates(["a", "b", "cat"], [0.50, 0.49, 0.48]), top_k=2)
+
+    assert [c["text"] for c in items] == ["a", "b"]
+    assert stats["reason"] == "model_unavailable"
+    assert stats["pairs_scored"] == 0
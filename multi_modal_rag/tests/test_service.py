@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from multi_modal_rag.serving.api import create_app
+
+
+def stub_generate(context_items, question):
+    return f"stub answer (Page {context_items[0]['page']})"
+
+
+def _client(store_dir, embed_fn):
+    app = create_app(embed_fn=embed_fn, generate_fn=stub_generate,
+                     store_dir=str(store_dir), use_reranker=False)
+    return TestClient(app)
+
+
+@pytest.fixture
+def client(tmp_path, stub_embed):
+    with _client(tmp_path / "store", stub_embed) as c:
+        yield c
+
+
+@pytest.fixture
+def doc_pdf(tmp_path, make_pdf):
+    return make_pdf(tmp_path / "doc.pdf", "The capital of France is Paris.", "Bananas are yellow fruit.")
+
+
+def _upload(client, pdf_path):
+    with open(pdf_path, "rb") as f:
+        r = client.post("/ingest", files={"file": ("doc.pdf", f, "application/pdf")})
+    assert r.status_code == 202
+    return r.json()["doc_id"]
+
+
+def _wait(client, doc_id):
+    for _ in range(100):
+        status = client.get(f"/ingest/{doc_id}").json()
+        if status["stage"] in ("ready", "failed"):
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f"ingest did not finish: {status}")
+
+
+def _ingest(client, pdf_path):
+    doc_id = _upload(client, pdf_path)
+    assert _wait(client, doc_id)["stage"] == "ready"
+    return doc_id
+
+
+def test_ingest_query_and_batch(client, doc_pdf):
+    pdf = doc_pdf
+    doc_id = _ingest(client, pdf)
+
+    # Re-uploading the same file is deduplicated onto the stored document
+    assert _ingest(client, pdf) == doc_id
+
+    r = client.post("/query", json={"doc_id": doc_id, "question": "capital of France", "top_k": 1})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["answer"] == "stub answer (Page 1)"
+    assert body["sources"][0]["page"] == 1
+
+    r = client.post("/query/batch", json={
+        "doc_id": doc_id, "questions": ["capital of France", "yellow bananas"], "top_k": 1})
+    assert r.status_code == 200
+    pages = [res["sources"][0]["page"] for res in r.json()["results"]]
+    assert pages == [1, 2]
+
+
+def test_unknown_document(client):
+    r = client.post("/query", json={"doc_id": "0" * 64, "question": "anything"})
+    assert r.status_code == 404
+
+
+def test_workers_share_ingest_state_through_store(tmp_path, doc_pdf, stub_embed):
+    release = threading.Event()
+    embed_calls = []
+
+    def slow_embed(texts):
+        embed_calls.append(list(texts))
+        release.wait(5)
+        return stub_embed(texts)
+
+    pdf = doc_pdf
+    store = tmp_path / "store"
+
+    # Two workers serving the same store_dir
+    with _client(store, slow_embed) as a, _client(store, slow_embed) as b:
+        doc_id = _upload(a, pdf)
+
+        # b sees a's in-flight ingest and does not start its own
+        assert b.get(f"/ingest/{doc_id}").status_code == 200
+        assert _upload(b, pdf) == doc_id
+        r = b.post("/query", json={"doc_id": doc_id, "question": "capital of France"})
+        assert r.status_code == 409
+        assert b.app.state.jobs.get(doc_id) is None
+
+        release.set()
+        assert _wait(b, doc_id)["stage"] == "ready"
+
+        r = b.post("/query", json={"doc_id": doc_id, "question": "capital of France", "top_k": 1})
+        assert r.status_code == 200
+        assert r.json()["sources"][0]["page"] == 1
+
+    # Only a's ingest embedded the chunks (one batch); the rest were queries
+    assert len(embed_calls[0]) == 2
+    assert not os.listdir(store / "uploads")
+    assert not [n for n in os.listdir(store) if n.endswith(".pending")]
+
+
+def test_failed_ingest_cleans_up_and_can_be_retried(client, tmp_path):
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+    store = client.app.state.store
+
+    doc_id = _upload(client, bad)
+    status = _wait(client, doc_id)
+    assert status["stage"] == "failed" and status["error"]
+    assert not os.listdir(os.path.join(store.root, "uploads"))
+    assert not store.is_pending(doc_id)
+
+    r = client.post("/query", json={"doc_id": doc_id, "question": "anything"})
+    assert r.status_code == 422
+
+    # Re-uploading starts a fresh ingest instead of returning the failure
+    first = client.app.state.jobs.get(doc_id)
+    assert _upload(client, bad) == doc_id
+    assert client.app.state.jobs.get(doc_id) is not first
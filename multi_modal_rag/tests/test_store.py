@@ -0,0 +1,52 @@
+import os
+import time
+
+from multi_modal_rag.index.store import DocumentStore
+
+DOC_ID = "ab" * 32
+
+
+def _age(store, doc_id, seconds):
+    past = time.time() - seconds
+    for path in (store._pending_path(doc_id), store._progress_path(doc_id)):
+        if os.path.exists(path):
+            os.utime(path, (past, past))
+
+
+def test_claim_is_exclusive_and_release_checks_owner(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    token = store.claim(DOC_ID)
+
+    assert token is not None
+    assert store.claim(DOC_ID) is None
+    assert store.read_progress(DOC_ID)["stage"] == "queued"
+
+    store.release(DOC_ID, "someone-else")
+    assert store.is_pending(DOC_ID)
+
+    store.release(DOC_ID, token)
+    assert not store.is_pending(DOC_ID)
+    assert store.claim(DOC_ID) is not None
+
+
+def test_stale_lock_takeover_keeps_new_owner_lock(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    old = store.claim(DOC_ID)
+    _age(store, DOC_ID, 3600)
+
+    new = store.claim(DOC_ID, stale_after=60)
+    assert new is not None and new != old
+    assert store.owns(DOC_ID, new) and not store.owns(DOC_ID, old)
+
+    # The slow original owner finishing must not unlock the new owner
+    store.release(DOC_ID, old)
+    assert store.owns(DOC_ID, new)
+    assert not [n for n in os.listdir(tmp_path) if ".stale-" in n]
+
+
+def test_live_lock_is_not_taken_over(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    token = store.claim(DOC_ID)
+
+    assert store.claim(DOC_ID, stale_after=60) is None
+    assert store.owns(DOC_ID, token)